@@ -72,19 +72,17 @@ const processReceipt = asyncHandler(async (req, res) => {
     }
 
     try {
-      // Send file to Flask OCR service
-      const formData = new FormData();
-      const fileBuffer = fs.readFileSync(req.file.path);
-      const blob = new Blob([fileBuffer], { type: req.file.mimetype });
-      formData.append('file', blob, req.file.originalname);
-
+      // Stream file to Flask OCR service as a raw body
       const ocrResponse = await axios.post(
-        `${process.env.FLASK_OCR_URL}/process-receipt`,
-        formData,
+        `${process.env.FLASK_OCR_URL}/process-receipt-stream`,
+        fs.createReadStream(req.file.path),
         {
+          params: { filename: req.file.originalname },
           headers: {
-            'Content-Type': 'multipart/form-data',
+            'Content-Type': 'application/octet-stream',
+            'Content-Length': req.file.size
           },
+          maxBodyLength: Infinity,
           timeout: 30000 // 30 seconds timeout
         }
       );
@@ -271,19 +269,17 @@ const reprocessReceipt = asyncHandler(async (req, res) => {
   }
 
   try {
-    // Send file to Flask OCR service for reprocessing
-    const formData = new FormData();
-    const fileBuffer = fs.readFileSync(attachment.path);
-    const blob = new Blob([fileBuffer], { type: attachment.mimetype });
-    formData.append('file', blob, attachment.originalName);
-
+    // Stream file to Flask OCR service for reprocessing
     const ocrResponse = await axios.post(
-      `${process.env.FLASK_OCR_URL}/process-receipt`,
-      formData,
+      `${process.env.FLASK_OCR_URL}/process-receipt-stream`,
+      fs.createReadStream(attachment.path),
       {
+        params: { filename: attachment.originalName },
         headers: {
-          'Content-Type': 'multipart/form-data',
+          'Content-Type': 'application/octet-stream',
+          'Content-Length': fs.statSync(attachment.path).size
         },
+        maxBodyLength: Infinity,
         timeout: 30000
       }
     );
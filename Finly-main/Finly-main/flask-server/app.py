@@ -4,47 +4,137 @@ Handles receipt processing using Tesseract OCR
 """
 
 import os
+import json
 import logging
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import atexit
+import queue
+import threading
+from flask import Flask, Request, Response, request, jsonify, stream_with_context
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
 import tempfile
 import shutil
 
-from ocr_service import OCRProcessor
+from ocr_service import OCRProcessor, get_worker_pool, process_receipt_job
 
 # Load environment variables
 load_dotenv()
 
+class UploadRequest(Request):
+    """Request that caps multipart parser memory and part count"""
+    max_form_memory_size = 500 * 1024  # non-file form fields
+    max_form_parts = 100
+
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = UploadRequest
 
 # Configure CORS
-CORS(app, origins=['http://localhost:3000', 'http://localhost:5000'])
+CORS_ORIGINS = frozenset({'http://localhost:3000', 'http://localhost:5000'})
+CORS_ALLOW_METHODS = 'GET, POST, OPTIONS'
 
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 10 * 1024 * 1024))  # 10MB
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 
+# Receipts are OCR'd and deleted straight away, so keep temp files on tmpfs when available
+if os.getenv('TEMP_FOLDER'):
+    app.config['TEMP_FOLDER'] = os.getenv('TEMP_FOLDER')
+elif not os.getenv('TMPDIR') and os.path.isdir('/dev/shm'):
+    app.config['TEMP_FOLDER'] = '/dev/shm/finly-ocr'
+else:
+    app.config['TEMP_FOLDER'] = tempfile.gettempdir()
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize OCR processor
-ocr_processor = OCRProcessor()
+ocr_processor = OCRProcessor(temp_dir=app.config['TEMP_FOLDER'])
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(app.config['TEMP_FOLDER'], exist_ok=True)
+
+# Endpoints that accept uploaded files
+UPLOAD_ENDPOINTS = frozenset({'process_receipt', 'process_receipt_stream', 'process_receipts'})
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
+ALLOWED_SUFFIXES = frozenset(f'.{ext}' for ext in ALLOWED_EXTENSIONS)
 
-def allowed_file(filename):
-    """Check if file extension is allowed"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Uploads up to this size are OCR'd straight from memory
+IN_MEMORY_MAX_SIZE = 2 * 1024 * 1024  # 2MB
+
+class TempFilePool:
+    """Bounded pool of reusable temporary files, one queue per suffix"""
+    
+    def __init__(self, directory, size, suffixes=()):
+        self.directory = directory
+        self.size = size
+        self._queues = {}
+        self._lock = threading.Lock()
+        
+        # Pre-create files so the first requests skip mkstemp too
+        for suffix in suffixes:
+            for _ in range(size):
+                self._queue(suffix).put_nowait(self._create(suffix))
+    
+    def _queue(self, suffix):
+        with self._lock:
+            if suffix not in self._queues:
+                self._queues[suffix] = queue.Queue(maxsize=self.size)
+            return self._queues[suffix]
+    
+    def _create(self, suffix):
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.directory)
+        os.close(fd)
+        return path
+    
+    def acquire(self, suffix):
+        """Check out an empty temporary file path ending in suffix"""
+        suffix = suffix.lower()
+        try:
+            return self._queue(suffix).get_nowait()
+        except queue.Empty:
+            return self._create(suffix)
+    
+    def release(self, path):
+        """Return a path to the pool, or delete it if the pool is full"""
+        try:
+            # Truncate so pooled files don't hold on to tmpfs memory
+            os.truncate(path, 0)
+            self._queue(os.path.splitext(path)[1]).put_nowait(path)
+        except (OSError, queue.Full):
+            if os.path.exists(path):
+                os.unlink(path)
+    
+    def clear(self):
+        """Delete every pooled file"""
+        with self._lock:
+            queues = list(self._queues.values())
+        for q in queues:
+            while True:
+                try:
+                    path = q.get_nowait()
+                except queue.Empty:
+                    break
+                if os.path.exists(path):
+                    os.unlink(path)
+
+# Reusable temp files for uploads
+temp_file_pool = TempFilePool(
+    app.config['TEMP_FOLDER'],
+    int(os.getenv('TEMP_POOL_SIZE', 4)),
+    suffixes=ALLOWED_SUFFIXES
+)
+atexit.register(temp_file_pool.clear)
+
+def allowed_extension(filename):
+    """Return the lower-cased extension of filename if it is allowed, else None"""
+    ext = os.path.splitext(filename)[1].lower()
+    return ext if ext in ALLOWED_SUFFIXES else None
 
 @app.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(error):
@@ -54,6 +144,38 @@ def handle_file_too_large(error):
         'message': 'File size too large. Maximum size is 10MB.'
     }), 413
 
+@app.after_request
+def add_cors_headers(response):
+    """Add CORS headers for allowed origins; OPTIONS is answered by Flask"""
+    origin = request.headers.get('Origin')
+    if origin in CORS_ORIGINS:
+        response.headers['Access-Control-Allow-Origin'] = origin
+        if request.method == 'OPTIONS':
+            response.headers['Access-Control-Allow-Methods'] = CORS_ALLOW_METHODS
+            requested_headers = request.headers.get('Access-Control-Request-Headers')
+            if requested_headers:
+                response.headers['Access-Control-Allow-Headers'] = requested_headers
+    response.vary.add('Origin')
+    return response
+
+@app.before_request
+def check_upload_size():
+    """Reject uploads by Content-Length before any body parsing happens"""
+    # CORS preflights carry no body and must reach the CORS handler
+    if request.method != 'POST' or request.endpoint not in UPLOAD_ENDPOINTS:
+        return None
+    
+    if request.content_length is None:
+        return jsonify({
+            'success': False,
+            'message': 'Content-Length header is required'
+        }), 411
+    
+    if request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        raise RequestEntityTooLarge()
+    
+    return None
+
 @app.errorhandler(500)
 def handle_internal_error(error):
     """Handle internal server errors"""
@@ -63,15 +185,35 @@ def handle_internal_error(error):
         'message': 'Internal server error occurred'
     }), 500
 
+# Constant response bodies, serialized once at startup
+_HEALTH_BODY = json.dumps({
+    'success': True,
+    'message': 'OCR service is running',
+    'service': 'Flask OCR Service',
+    'version': '1.0.0'
+}).encode()
+
+_FORMATS_BODY = json.dumps({
+    'success': True,
+    'data': {
+        'supportedFormats': sorted(ALLOWED_EXTENSIONS),
+        'maxFileSize': app.config['MAX_CONTENT_LENGTH'],
+        'maxFileSizeMB': app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024),
+        'features': [
+            'Text extraction from images (PNG, JPG, JPEG)',
+            'PDF text extraction',
+            'Amount detection',
+            'Date recognition',
+            'Merchant name identification',
+            'Receipt structure analysis'
+        ]
+    }
+}).encode()
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'success': True,
-        'message': 'OCR service is running',
-        'service': 'Flask OCR Service',
-        'version': '1.0.0'
-    })
+    return Response(_HEALTH_BODY, mimetype='application/json')
 
 @app.route('/process-receipt', methods=['POST'])
 def process_receipt():
@@ -86,51 +228,178 @@ def process_receipt():
                 'message': 'No file provided'
             }), 400
         
-        file = request.files['file']
+        fs = request.files['file']
         
         # Check if file is selected
-        if file.filename == '':
+        if fs.filename == '':
             return jsonify({
                 'success': False,
                 'message': 'No file selected'
             }), 400
         
         # Check file extension
-        if not allowed_file(file.filename):
+        ext = allowed_extension(fs.filename)
+        if ext is None:
             return jsonify({
                 'success': False,
                 'message': 'Invalid file type. Allowed types: PNG, JPG, JPEG, PDF'
             }), 400
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, 
-                                       suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            temp_filepath = temp_file.name
+        # Small uploads skip the round trip through a temporary file. The
+        # part is already spooled, so measure it rather than trusting the
+        # client-supplied part Content-Length.
+        stream = fs.stream
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell()
+        stream.seek(0)
+        if size <= IN_MEMORY_MAX_SIZE:
+            return ocr_receipt(stream, fs.filename, ext)
         
+        # Check out a temporary file
+        temp_filepath = temp_file_pool.acquire(ext)
         try:
-            # Process the file
-            result = ocr_processor.process_receipt(temp_filepath)
-            
-            logger.info(f"Successfully processed receipt: {file.filename}")
-            
+            fs.save(temp_filepath)
+            return ocr_receipt(temp_filepath, fs.filename, ext)
+        finally:
+            temp_file_pool.release(temp_filepath)
+    
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'An unexpected error occurred'
+        }), 500
+
+@app.route('/process-receipt-stream', methods=['POST'])
+def process_receipt_stream():
+    """
+    Process a receipt sent as a raw application/octet-stream body.
+    The original filename is passed in the `filename` query parameter.
+    The body is copied from the socket straight into a temporary file,
+    bypassing the multipart form parser.
+    """
+    try:
+        if request.mimetype != 'application/octet-stream':
             return jsonify({
-                'success': True,
-                'message': 'Receipt processed successfully',
-                'data': result
-            })
-            
-        except Exception as e:
-            logger.error(f"Error processing receipt {file.filename}: {str(e)}")
+                'success': False,
+                'message': 'Content-Type must be application/octet-stream'
+            }), 400
+        
+        filename = request.args.get('filename', '')
+        
+        # Check file extension on the raw name; secure_filename drops
+        # non-ASCII characters, which can take the stem's dot with them
+        ext = allowed_extension(filename)
+        if ext is None:
             return jsonify({
                 'success': False,
-                'message': f'Error processing receipt: {str(e)}'
-            }), 500
-            
+                'message': 'Invalid file type. Allowed types: PNG, JPG, JPEG, PDF'
+            }), 400
+        
+        # Write the body to a temporary file as it arrives
+        temp_filepath = temp_file_pool.acquire(ext)
+        try:
+            with open(temp_filepath, 'wb') as temp_file:
+                shutil.copyfileobj(request.stream, temp_file, length=1 << 20)
+            return ocr_receipt(temp_filepath, secure_filename(filename), ext)
         finally:
-            # Clean up temporary file
-            if os.path.exists(temp_filepath):
-                os.unlink(temp_filepath)
+            temp_file_pool.release(temp_filepath)
+    
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'An unexpected error occurred'
+        }), 500
+
+def ocr_receipt(source, filename, file_extension):
+    """
+    Run OCR on an uploaded receipt and build the JSON response.
+    source is a file path or a binary stream.
+    """
+    try:
+        # Process the file
+        result = ocr_processor.process_receipt(source, file_extension)
+        
+        logger.info(f"Successfully processed receipt: {filename}")
+        
+        return jsonify({
+            'success': True,
+            'message': 'Receipt processed successfully',
+            'data': result
+        })
+        
+    except Exception as e:
+        logger.error(f"Error processing receipt {filename}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error processing receipt: {str(e)}'
+        }), 500
+
+@app.route('/process-receipts', methods=['POST'])
+def process_receipts():
+    """
+    Process several uploaded receipts in parallel across the OCR worker pool.
+    Results are streamed back as newline-delimited JSON, one object per
+    file, in completion order.
+    """
+    try:
+        files = [f for f in request.files.getlist('files') if f.filename]
+        
+        if not files:
+            return jsonify({
+                'success': False,
+                'message': 'No files provided'
+            }), 400
+        
+        # Check file extensions
+        extensions = [allowed_extension(f.filename) for f in files]
+        invalid = [f.filename for f, ext in zip(files, extensions) if ext is None]
+        if invalid:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid file type for: {", ".join(invalid)}. Allowed types: PNG, JPG, JPEG, PDF'
+            }), 400
+        
+        # Save every upload to a temporary file
+        filenames = {}
+        try:
+            for fs, ext in zip(files, extensions):
+                temp_filepath = temp_file_pool.acquire(ext)
+                filenames[temp_filepath] = fs.filename
+                fs.save(temp_filepath)
+        except Exception:
+            for temp_filepath in filenames:
+                temp_file_pool.release(temp_filepath)
+            raise
+        
+        def generate():
+            results = get_worker_pool(app.config['TEMP_FOLDER']).imap_unordered(process_receipt_job, list(filenames))
+            try:
+                for temp_filepath, result, error in results:
+                    filename = filenames[temp_filepath]
+                    temp_file_pool.release(temp_filepath)
+                    
+                    if error is None:
+                        logger.info(f"Successfully processed receipt: {filename}")
+                        line = {'filename': filename, 'success': True, 'data': result}
+                    else:
+                        logger.error(f"Error processing receipt {filename}: {error}")
+                        line = {
+                            'filename': filename,
+                            'success': False,
+                            'message': f'Error processing receipt: {error}'
+                        }
+                    yield json.dumps(line) + '\n'
+            finally:
+                # If the client went away, let outstanding jobs finish before
+                # their temp files go back to the pool
+                for temp_filepath, _, _ in results:
+                    temp_file_pool.release(temp_filepath)
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
     
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
@@ -182,22 +451,7 @@ def get_supported_formats():
     """
     Get list of supported file formats and limits
     """
-    return jsonify({
-        'success': True,
-        'data': {
-            'supportedFormats': list(ALLOWED_EXTENSIONS),
-            'maxFileSize': app.config['MAX_CONTENT_LENGTH'],
-            'maxFileSizeMB': app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024),
-            'features': [
-                'Text extraction from images (PNG, JPG, JPEG)',
-                'PDF text extraction',
-                'Amount detection',
-                'Date recognition',
-                'Merchant name identification',
-                'Receipt structure analysis'
-            ]
-        }
-    })
+    return Response(_FORMATS_BODY, mimetype='application/json')
 
 @app.route('/test-ocr', methods=['GET'])
 def test_ocr():
@@ -221,6 +475,7 @@ def test_ocr():
             'message': f'OCR test failed: {str(e)}'
         }), 500
 
+# Development server only; production runs under gunicorn (see gunicorn_conf.py)
 if __name__ == '__main__':
     port = int(os.getenv('FLASK_PORT', 5001))
     debug = os.getenv('FLASK_ENV') == 'development'
@@ -228,6 +483,7 @@ if __name__ == '__main__':
     logger.info(f"Starting Flask OCR Service on port {port}")
     logger.info(f"Debug mode: {debug}")
     logger.info(f"Upload folder: {app.config['UPLOAD_FOLDER']}")
+    logger.info(f"Temp folder: {app.config['TEMP_FOLDER']}")
     logger.info(f"Max file size: {app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024):.1f}MB")
     
     app.run(
@@ -0,0 +1,30 @@
+"""
+Gunicorn Configuration
+Production server settings for the Flask OCR service
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('FLASK_PORT', 5001)}"
+
+# A couple of workers for availability; OCR parallelism comes from each
+# worker's process pool rather than from more web workers, so multi-page
+# PDFs and batches can spread across several cores
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+
+# Each worker starts its own OCR process pool; tell them how many workers
+# share the machine so the pools split the cores instead of each taking all
+os.environ.setdefault('OCR_WEB_WORKERS', str(workers))
+threads = 4
+worker_class = 'gthread'
+
+# OCR on large PDFs can take a while
+timeout = 60
+
+# Recycle workers periodically to cap memory growth
+max_requests = 500
+max_requests_jitter = 50
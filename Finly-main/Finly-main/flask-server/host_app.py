@@ -4,24 +4,42 @@ Serves the React frontend and coordinates backend services
 """
 
 import os
+import logging
 import subprocess
 import threading
 import time
 import signal
 import sys
-from flask import Flask, send_from_directory, jsonify
-from flask_cors import CORS
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from flask import Flask, Response, request, send_from_directory, jsonify
 import requests
-from werkzeug.exceptions import NotFound
+from requests.adapters import HTTPAdapter
 
-# Initialize Flask app
-app = Flask(__name__, static_folder='../frontend/build', static_url_path='')
-CORS(app)
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+logger = logging.getLogger('finly.host')
+
+# Initialize Flask app; the React build is served by the routes below, since
+# a built-in static route at '' would shadow the SPA fallback
+app = Flask(__name__, static_folder=None)
+
+# Hand static file transfers to the front-end web server (nginx/apache)
+# when it has X-Sendfile support enabled
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
 
 # Configuration
 BACKEND_URL = 'http://localhost:5000'
 OCR_SERVICE_URL = 'http://localhost:5001'
 FRONTEND_BUILD_PATH = '../frontend/build'
+FRONTEND_BUILD_DIR = os.path.join(app.root_path, FRONTEND_BUILD_PATH)
+
+# Shared session so health probes reuse keep-alive connections
+SESSION = requests.Session()
+SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+
+# How long a health probe result is reused, in seconds
+HEALTH_CACHE_TTL = 1.0
 
 class ServiceManager:
     """Manages backend services"""
@@ -29,11 +47,13 @@ class ServiceManager:
     def __init__(self):
         self.processes = {}
         self.running = False
+        self._health_cache = {}
+        self._health_lock = threading.Lock()
     
     def start_backend(self):
         """Start Node.js backend server"""
         try:
-            print("🚀 Starting Node.js backend server...")
+            logger.info("🚀 Starting Node.js backend server...")
             backend_process = subprocess.Popen(
                 ['npm', 'run', 'dev'],
                 cwd='../backend',
@@ -42,37 +62,52 @@ class ServiceManager:
                 preexec_fn=os.setsid if os.name != 'nt' else None
             )
             self.processes['backend'] = backend_process
-            print("✅ Backend server started on port 5000")
+            logger.info("✅ Backend server started on port 5000")
             return True
         except Exception as e:
-            print(f"❌ Failed to start backend server: {e}")
+            logger.error(f"❌ Failed to start backend server: {e}")
             return False
     
     def start_ocr_service(self):
         """Start Flask OCR service"""
         try:
-            print("🔍 Starting OCR service...")
+            logger.info("🔍 Starting OCR service...")
+            # Gunicorn has no Windows support, fall back to the dev server there
+            if os.name == 'nt':
+                command = ['python', 'app.py']
+            else:
+                command = ['gunicorn', '-c', 'gunicorn_conf.py', 'app:app']
             ocr_process = subprocess.Popen(
-                ['python', 'app.py'],
+                command,
                 cwd='../flask-server',
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 preexec_fn=os.setsid if os.name != 'nt' else None
             )
             self.processes['ocr'] = ocr_process
-            print("✅ OCR service started on port 5001")
+            logger.info("✅ OCR service started on port 5001")
             return True
         except Exception as e:
-            print(f"❌ Failed to start OCR service: {e}")
+            logger.error(f"❌ Failed to start OCR service: {e}")
             return False
     
-    def check_service_health(self, url, service_name):
-        """Check if a service is healthy"""
+    def check_service_health(self, url, service_name, use_cache=True):
+        """Check if a service is healthy, reusing results younger than HEALTH_CACHE_TTL"""
+        if use_cache:
+            with self._health_lock:
+                cached = self._health_cache.get(url)
+            if cached and time.monotonic() < cached[0]:
+                return cached[1]
+        
         try:
-            response = requests.get(f"{url}/health", timeout=5)
-            return response.status_code == 200
+            response = SESSION.get(f"{url}/health", timeout=2)
+            healthy = response.status_code == 200
         except:
-            return False
+            healthy = False
+        
+        with self._health_lock:
+            self._health_cache[url] = (time.monotonic() + HEALTH_CACHE_TTL, healthy)
+        return healthy
     
     def wait_for_services(self):
         """Wait for all services to be healthy"""
@@ -82,29 +117,27 @@ class ServiceManager:
         ]
         
         for url, name in services:
-            print(f"⏳ Waiting for {name} to be ready...")
-            max_attempts = 30
-            for attempt in range(max_attempts):
-                if self.check_service_health(url, name):
-                    print(f"✅ {name} is ready!")
+            logger.info(f"⏳ Waiting for {name} to be ready...")
+            # Poll with exponential backoff so fast starts are noticed quickly
+            deadline = time.monotonic() + 60
+            delay = 0.05
+            while True:
+                if self.check_service_health(url, name, use_cache=False):
+                    logger.info(f"✅ {name} is ready!")
+                    break
+                if time.monotonic() >= deadline:
+                    logger.error(f"❌ {name} failed to start within timeout")
                     break
-                time.sleep(2)
-                if attempt == max_attempts - 1:
-                    print(f"❌ {name} failed to start within timeout")
+                time.sleep(delay)
+                delay = min(delay * 1.7, 1.0)
     
     def start_all_services(self):
         """Start all backend services"""
         self.running = True
         
-        # Start services in separate threads
-        backend_thread = threading.Thread(target=self.start_backend)
-        ocr_thread = threading.Thread(target=self.start_ocr_service)
-        
-        backend_thread.daemon = True
-        ocr_thread.daemon = True
-        
-        backend_thread.start()
-        ocr_thread.start()
+        # Popen returns immediately, so both services start concurrently
+        self.start_backend()
+        self.start_ocr_service()
         
         # Wait for services to be ready
         self.wait_for_services()
@@ -112,7 +145,7 @@ class ServiceManager:
     def stop_all_services(self):
         """Stop all running services"""
         self.running = False
-        print("\n🛑 Stopping all services...")
+        logger.info("🛑 Stopping all services...")
         
         for name, process in self.processes.items():
             try:
@@ -120,9 +153,9 @@ class ServiceManager:
                     process.terminate()
                 else:  # Unix/Linux/macOS
                     os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-                print(f"✅ Stopped {name} service")
+                logger.info(f"✅ Stopped {name} service")
             except Exception as e:
-                print(f"❌ Error stopping {name} service: {e}")
+                logger.error(f"❌ Error stopping {name} service: {e}")
 
 # Global service manager
 service_manager = ServiceManager()
@@ -143,49 +176,94 @@ def system_health():
 @app.route('/api/system/status')
 def system_status():
     """Get system status and information"""
+    backend_healthy = service_manager.check_service_health(BACKEND_URL, 'backend')
+    ocr_healthy = service_manager.check_service_health(OCR_SERVICE_URL, 'ocr')
+    
     return jsonify({
         'status': 'running' if service_manager.running else 'stopped',
         'services': {
             'backend': {
                 'url': BACKEND_URL,
-                'healthy': service_manager.check_service_health(BACKEND_URL, 'backend')
+                'healthy': backend_healthy
             },
             'ocr': {
                 'url': OCR_SERVICE_URL,
-                'healthy': service_manager.check_service_health(OCR_SERVICE_URL, 'ocr')
+                'healthy': ocr_healthy
             }
         },
         'version': '1.0.0',
         'environment': 'development'
     })
 
-# Serve React app
-@app.route('/')
-def serve_react_app():
-    """Serve the React application"""
+def load_frontend_build():
+    """
+    Return the React build's index.html and the relative paths of its files,
+    or (None, frozenset()) if it hasn't been built. Both are reloaded only
+    when index.html's mtime changes, i.e. after a new build.
+    """
+    global _build_cache
+    index_path = os.path.join(FRONTEND_BUILD_DIR, 'index.html')
     try:
-        return send_from_directory(app.static_folder, 'index.html')
-    except NotFound:
+        mtime = os.stat(index_path).st_mtime_ns
+        if _build_cache[0] != mtime:
+            with open(index_path, 'rb') as f:
+                index_html = f.read()
+            root = Path(FRONTEND_BUILD_DIR)
+            assets = frozenset(p.relative_to(root).as_posix()
+                               for p in root.rglob('*') if p.is_file())
+            _build_cache = (mtime, index_html, assets)
+    except OSError:
+        return None, frozenset()
+    return _build_cache[1], _build_cache[2]
+
+# index.html is served for every client-side route, so keep it in memory
+# with the asset list as (mtime, index.html, assets) and only go back to
+# disk when it changes
+FRONTEND_BUILD_FOUND = Path(FRONTEND_BUILD_PATH).is_dir()
+_build_cache = (None, None, frozenset())
+
+def index_response():
+    """Serve the cached index.html"""
+    index_html = load_frontend_build()[0]
+    if index_html is None:
         return jsonify({
             'error': 'Frontend build not found',
             'message': 'Please run "npm run build" in the frontend directory first'
         }), 404
+    
+    response = Response(index_html, mimetype='text/html')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.after_request
+def add_cors_headers(response):
+    """Allow any origin; OPTIONS is answered by Flask"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+        requested_headers = request.headers.get('Access-Control-Request-Headers')
+        if requested_headers:
+            response.headers['Access-Control-Allow-Headers'] = requested_headers
+    return response
+
+# Serve React app
+@app.route('/')
+def serve_react_app():
+    """Serve the React application"""
+    return index_response()
 
 @app.route('/<path:path>')
 def serve_static_files(path):
     """Serve static files or React app"""
-    try:
-        # Try to serve static file first
-        return send_from_directory(app.static_folder, path)
-    except NotFound:
-        # If file not found, serve React app (for client-side routing)
-        try:
-            return send_from_directory(app.static_folder, 'index.html')
-        except NotFound:
-            return jsonify({
-                'error': 'Frontend build not found',
-                'message': 'Please run "npm run build" in the frontend directory first'
-            }), 404
+    if path in load_frontend_build()[1]:
+        response = send_from_directory(FRONTEND_BUILD_DIR, path)
+        # Let browsers cache the fingerprinted build assets indefinitely
+        if path.startswith('static/'):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+    
+    # Anything else is a client-side route
+    return index_response()
 
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
@@ -193,44 +271,38 @@ def signal_handler(signum, frame):
     service_manager.stop_all_services()
     sys.exit(0)
 
+def run_version_probe(command):
+    """Run a version command, returning its result or None if the tool is missing"""
+    try:
+        return subprocess.run(command, capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+
 def check_prerequisites():
     """Check if required tools are installed"""
     print("🔍 Checking prerequisites...")
     
+    # Probe all tools at once so the check takes as long as the slowest one
+    commands = [['node', '--version'], ['python', '--version'], ['python3', '--version']]
+    with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        node, python, python3 = executor.map(run_version_probe, commands)
+    
     # Check if Node.js is installed
-    try:
-        result = subprocess.run(['node', '--version'], capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✅ Node.js: {result.stdout.strip()}")
-        else:
-            print("❌ Node.js is not installed")
-            return False
-    except FileNotFoundError:
+    if node is None or node.returncode != 0:
         print("❌ Node.js is not installed")
         return False
+    print(f"✅ Node.js: {node.stdout.strip()}")
     
-    # Check if Python is installed
-    try:
-        result = subprocess.run(['python', '--version'], capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✅ Python: {result.stdout.strip()}")
-        else:
-            print("❌ Python is not installed")
-            return False
-    except FileNotFoundError:
-        try:
-            result = subprocess.run(['python3', '--version'], capture_output=True, text=True)
-            if result.returncode == 0:
-                print(f"✅ Python: {result.stdout.strip()}")
-            else:
-                print("❌ Python is not installed")
-                return False
-        except FileNotFoundError:
-            print("❌ Python is not installed")
-            return False
+    # Check if Python is installed, falling back to python3 when there's no python
+    if python is None:
+        python = python3
+    if python is None or python.returncode != 0:
+        print("❌ Python is not installed")
+        return False
+    print(f"✅ Python: {python.stdout.strip()}")
     
     # Check if frontend build exists
-    if not os.path.exists(FRONTEND_BUILD_PATH):
+    if not FRONTEND_BUILD_FOUND:
         print("⚠️  Frontend build not found. Please run 'npm run build' in the frontend directory.")
         print("   The application will still work, but you'll need to build the frontend first.")
     else:
@@ -3,40 +3,137 @@ OCR Service Module
 Handles receipt processing, text extraction, and data parsing
 """
 
+import io
 import os
 import re
+import atexit
+import hashlib
 import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Optional, List, Tuple
+from typing import BinaryIO, Dict, Optional, List, Tuple, Union
 import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
 import cv2
 import numpy as np
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import tempfile
 
+try:
+    from tesserocr import PyTessBaseAPI, PSM, OEM, tesseract_version
+except ImportError:  # Fall back to the pytesseract subprocess
+    PyTessBaseAPI = None
+
+try:
+    import hyperscan
+except ImportError:  # Fall back to trying every pattern with re
+    hyperscan = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# pdftoppm processes used to rasterize a multi-page PDF
+PDF_RASTER_THREADS = min(4, os.cpu_count() or 1)
+
+# PDFs are rasterized at PDF_DPI; pages whose mean word confidence is
+# below PDF_RETRY_CONFIDENCE are rasterized again at PDF_RETRY_DPI
+PDF_DPI = 200
+PDF_RETRY_DPI = 300
+PDF_RETRY_CONFIDENCE = 60
+
+# PDF pages are rendered and OCR'd this many at a time, and each window's
+# page images are deleted before the next is rendered, so temporary space
+# stays bounded however long the document is
+PDF_PAGE_WINDOW = 4
+
+# Mean absolute difference between a page and its 3x3 Gaussian blur above
+# which the page is treated as speckled and median-filtered instead
+NOISE_THRESHOLD = 8.0
+
+# Lighting is judged on a BACKGROUND_SAMPLE_EDGE-pixel thumbnail with the
+# text dilated away; if its standard deviation is above BACKGROUND_STD_LIMIT
+# the lighting is too uneven for a single global Otsu threshold and adaptive
+# thresholding is used instead
+BACKGROUND_SAMPLE_EDGE = 64
+BACKGROUND_STD_LIMIT = 25.0
+
+# Uploaded images with a longer edge than this are shrunk before OCR;
+# phone photos are far above the ~300 DPI Tesseract works best at
+MAX_IMAGE_EDGE = 2000
+
+# Date formats tried by OCRProcessor._parse_date, in order of preference,
+# grouped by separator
+NUMERIC_DATE_FORMATS = {
+    separator: tuple(fmt.replace('/', separator) for fmt in (
+        '%m/%d/%Y', '%m/%d/%y', '%d/%m/%Y', '%d/%m/%y', '%Y/%m/%d'
+    ))
+    for separator in ('/', '-', '.')
+}
+MONTH_NAME_DATE_FORMATS = ('%B %d, %Y', '%b %d, %Y', '%d %B %Y', '%d %b %Y')
+
+# LSTM engine only, page treated as a single uniform block of text
+TESSERACT_CONFIG = r'--oem 1 --psm 6'
+
 class OCRProcessor:
     """Main OCR processing class for receipt analysis"""
     
-    def __init__(self):
-        """Initialize OCR processor with configuration"""
+    def __init__(self, temp_dir: Optional[str] = None):
+        """
+        Initialize OCR processor with configuration
+        
+        Args:
+            temp_dir (str): Directory for rendered PDF pages; the system
+                temporary directory when omitted
+        """
+        self.temp_dir = temp_dir
+        
         # Set Tesseract command path if specified
         tesseract_cmd = os.getenv('TESSERACT_CMD')
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
         
-        # Common currency symbols and patterns
-        self.currency_patterns = [
-            r'\$\s*(\d+\.?\d*)',  # $XX.XX
-            r'(\d+\.?\d*)\s*\$',  # XX.XX$
-            r'USD\s*(\d+\.?\d*)', # USD XX.XX
-            r'(\d+\.?\d*)\s*USD', # XX.XX USD
-            r'TOTAL\s*:?\s*\$?\s*(\d+\.?\d*)',  # TOTAL: $XX.XX
-            r'AMOUNT\s*:?\s*\$?\s*(\d+\.?\d*)', # AMOUNT: $XX.XX
-        ]
+        # The denoise/threshold filters rely on OpenCV's SIMD kernels
+        if 'AVX2' not in cv2.getBuildInformation():
+            logger.warning("OpenCV was built without AVX2 kernels; image preprocessing will be slower")
+        
+        # Results of recent receipts, keyed by content hash, most recent last
+        self._result_cache = OrderedDict()
+        self._result_cache_size = int(os.getenv('OCR_CACHE_SIZE', 128))
+        self._result_cache_lock = threading.Lock()
+        
+        # Per-thread preprocessing buffers, reused while the page size is unchanged
+        self._scratch = threading.local()
+        
+        # Keep resident Tesseract engines when tesserocr is available, so
+        # each page doesn't pay for a process launch and model load. An
+        # engine isn't thread-safe, so each thread gets its own on first use.
+        self._api_options = None
+        self._engines = threading.local()
+        if PyTessBaseAPI is not None:
+            self._api_options = {'lang': 'eng', 'psm': PSM.SINGLE_BLOCK, 'oem': OEM.LSTM_ONLY}
+            if os.getenv('TESSDATA_PREFIX'):
+                self._api_options['path'] = os.getenv('TESSDATA_PREFIX')
+        
+        # Looked up on first use; without tesserocr it costs a subprocess
+        self._tesseract_version = None
+        
+        # Common currency symbols and patterns, fused into one alternation so
+        # amounts are found in a single scan. Trailing '$'/'USD' markers are
+        # lookaheads so they stay available to a following '$XX'/'USD XX'.
+        self._amount_re = re.compile(
+            r'\$\s*(\d+\.?\d*)'                    # $XX.XX
+            r'|(\d+\.?\d*)\s*(?=\$)'               # XX.XX$
+            r'|USD\s*(\d+\.?\d*)'                  # USD XX.XX
+            r'|(\d+\.?\d*)\s*(?=USD)'              # XX.XX USD
+            r'|TOTAL\s*:?\s*\$?\s*(\d+\.?\d*)'     # TOTAL: $XX.XX
+            r'|AMOUNT\s*:?\s*\$?\s*(\d+\.?\d*)',   # AMOUNT: $XX.XX
+            re.IGNORECASE
+        )
+        
+        # Every amount alternative needs one of these markers, so text
+        # without any of them can't contain an amount
+        self._money_prefilter_re = re.compile(r'\$|TOTAL|AMOUNT|USD', re.IGNORECASE)
         
         # Date patterns
         self.date_patterns = [
@@ -51,40 +148,89 @@ class OCRProcessor:
             'pharmacy', 'gas', 'station', 'hotel', 'motel', 'inn',
             'hospital', 'clinic', 'medical', 'dental'
         ]
+        
+        # Compile every pattern once instead of on each receipt
+        self._date_res = [re.compile(p, re.IGNORECASE) for p in self.date_patterns]
+        self._whitespace_re = re.compile(r'\s+')
+        self._special_chars_re = re.compile(r'[^\w\s\$\.\,\:\;\-\/\(\)]')
+        self._special_chars_table = str.maketrans({
+            chr(c): ' ' for c in range(128) if self._special_chars_re.match(chr(c))
+        })
+        self._digit_line_re = re.compile(r'^\d+[\d\s\-\(\)]*$')
+        self._phone_re = re.compile(r'^\d{10,}$')
+        self._phone_strip_table = str.maketrans('', '', ' -()')
+        self._merchant_indicators_re = re.compile(
+            '|'.join(map(re.escape, self.merchant_indicators)), re.IGNORECASE
+        )
+        self._capitalized_re = re.compile(r'\b[A-Z][A-Za-z\s&]+\b')
+        self._capitalized_words_re = re.compile(r'\b[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)*\b')
+        
+        # With Hyperscan, one pass over the text tells which of the amount and
+        # date patterns can match at all, so re only runs the ones that do
+        self._pattern_db = None
+        self._pattern_db_lock = threading.Lock()
+        if hyperscan is not None:
+            self._pattern_db = self._compile_pattern_database()
     
-    def process_receipt(self, file_path: str) -> Dict:
+    def process_receipt(self, source: Union[str, BinaryIO],
+                        file_extension: Optional[str] = None) -> Dict:
         """
         Process a receipt file and extract relevant information
         
         Args:
-            file_path (str): Path to the receipt file
+            source: Path to the receipt file, or a binary stream holding it
+            file_extension (str): File extension such as '.pdf'; taken from
+                the path when omitted, required for streams
             
         Returns:
             Dict: Extracted information from the receipt
         """
         try:
             # Determine file type and extract text
-            file_extension = os.path.splitext(file_path)[1].lower()
+            if file_extension is None:
+                file_extension = os.path.splitext(source)[1]
+            file_extension = file_extension.lower()
+            
+            if file_extension not in ['.pdf', '.png', '.jpg', '.jpeg']:
+                raise ValueError(f"Unsupported file type: {file_extension}")
+            
+            # Retried or duplicate uploads reuse the earlier result
+            if isinstance(source, str):
+                digest = self._file_digest(source)
+            else:
+                content = source.read()
+                digest = hashlib.blake2b(content, digest_size=16).digest()
+                source = io.BytesIO(content)
+            cache_key = (digest, file_extension)
+            
+            with self._result_cache_lock:
+                cached = self._result_cache.get(cache_key)
+                if cached is not None:
+                    self._result_cache.move_to_end(cache_key)
+                    return dict(cached)
             
             if file_extension == '.pdf':
-                extracted_text = self._extract_text_from_pdf(file_path)
-            elif file_extension in ['.png', '.jpg', '.jpeg']:
-                extracted_text = self._extract_text_from_image(file_path)
+                extracted_text = self._extract_text_from_pdf(source)
             else:
-                raise ValueError(f"Unsupported file type: {file_extension}")
+                extracted_text = self._extract_text_from_image(source)
             
             if not extracted_text.strip():
-                return {
+                result = {
                     'extractedText': '',
                     'extractedAmount': None,
                     'extractedDate': None,
                     'extractedMerchant': None,
                     'confidence': 0.0
                 }
+            else:
+                # Extract structured information
+                result = self.extract_from_text(extracted_text)
+                result['extractedText'] = extracted_text
             
-            # Extract structured information
-            result = self.extract_from_text(extracted_text)
-            result['extractedText'] = extracted_text
+            with self._result_cache_lock:
+                self._result_cache[cache_key] = dict(result)
+                if len(self._result_cache) > self._result_cache_size:
+                    self._result_cache.popitem(last=False)
             
             return result
             
@@ -92,31 +238,50 @@ class OCRProcessor:
             logger.error(f"Error processing receipt: {str(e)}")
             raise
     
-    def _extract_text_from_image(self, image_path: str) -> str:
+    def _file_digest(self, file_path: str) -> bytes:
+        """
+        Hash a file's contents in chunks
+        
+        Args:
+            file_path (str): Path to the file
+            
+        Returns:
+            bytes: 16-byte BLAKE2b digest
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.digest()
+    
+    def _extract_text_from_image(self, image_source: Union[str, BinaryIO]) -> str:
         """
         Extract text from image using OCR
         
         Args:
-            image_path (str): Path to the image file
+            image_source: Path to the image file, or a binary stream
             
         Returns:
             str: Extracted text
         """
         try:
-            # Load and preprocess image
-            image = cv2.imread(image_path)
+            # Load and preprocess image, decoding streams in memory; decoding
+            # straight to grayscale skips the colour decode and conversion
+            if isinstance(image_source, str):
+                image = cv2.imread(image_source, cv2.IMREAD_GRAYSCALE)
+            else:
+                buffer = np.frombuffer(image_source.read(), np.uint8)
+                image = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
             if image is None:
                 raise ValueError("Could not load image")
             
+            image = self._downsample_image(image)
+            
             # Preprocess image for better OCR results
             processed_image = self._preprocess_image(image)
             
-            # Convert to PIL Image for tesseract
-            pil_image = Image.fromarray(processed_image)
-            
             # Extract text using tesseract
-            custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,:;!?@#$%^&*()_+-=[]{}|\\;\':",./<>?~ '
-            text = pytesseract.image_to_string(pil_image, config=custom_config)
+            text = self._image_to_string(processed_image)
             
             return text.strip()
             
@@ -124,37 +289,55 @@ class OCRProcessor:
             logger.error(f"Error extracting text from image: {str(e)}")
             raise
     
-    def _extract_text_from_pdf(self, pdf_path: str) -> str:
+    def _extract_text_from_pdf(self, pdf_source: Union[str, BinaryIO]) -> str:
         """
         Extract text from PDF file
         
         Args:
-            pdf_path (str): Path to the PDF file
+            pdf_source: Path to the PDF file, or a binary stream
             
         Returns:
             str: Extracted text
         """
         try:
-            # Convert PDF pages to images
-            images = convert_from_path(pdf_path, dpi=300)
-            
-            extracted_text = ""
-            
-            for i, image in enumerate(images):
-                # Convert PIL image to numpy array for preprocessing
-                img_array = np.array(image)
-                
-                # Preprocess image
-                processed_image = self._preprocess_image(img_array)
+            # Pages are rendered to files a window at a time and loaded one
+            # by one for OCR, rather than holding every page in memory at once
+            with tempfile.TemporaryDirectory(prefix='finly-pdf-', dir=self.temp_dir) as page_dir:
+                # pdftoppm needs a file; write streams out once here rather
+                # than letting convert_from_bytes do it on every rasterization
+                if not isinstance(pdf_source, str):
+                    pdf_path = os.path.join(page_dir, 'source.pdf')
+                    with open(pdf_path, 'wb') as pdf_file:
+                        pdf_file.write(pdf_source.read())
+                    pdf_source = pdf_path
                 
-                # Convert back to PIL Image
-                pil_image = Image.fromarray(processed_image)
+                # Convert PDF pages to images and OCR them, window by window
+                page_count = pdfinfo_from_path(pdf_source)['Pages']
+                page_results = []
+                for first_page in range(1, page_count + 1, PDF_PAGE_WINDOW):
+                    last_page = min(first_page + PDF_PAGE_WINDOW - 1, page_count)
+                    page_paths = self._rasterize_pdf(pdf_source, PDF_DPI, page_dir,
+                                                     first_page, last_page)
+                    page_results.extend(self._ocr_rendered_pages(page_paths))
                 
-                # Extract text
-                custom_config = r'--oem 3 --psm 6'
-                page_text = pytesseract.image_to_string(pil_image, config=custom_config)
-                
-                extracted_text += f"\n--- Page {i+1} ---\n{page_text}"
+                # Give pages Tesseract wasn't confident about another go at a
+                # higher DPI; pages with no words at all (blank backs,
+                # separators) score 0 but gain nothing from a retry
+                retry_pages = [i for i, (page_text, confidence) in enumerate(page_results)
+                               if confidence < PDF_RETRY_CONFIDENCE and page_text.strip()]
+                for start in range(0, len(retry_pages), PDF_PAGE_WINDOW):
+                    window = retry_pages[start:start + PDF_PAGE_WINDOW]
+                    retry_paths = [
+                        self._rasterize_pdf(pdf_source, PDF_RETRY_DPI, page_dir, i + 1, i + 1)[0]
+                        for i in window
+                    ]
+                    for i, result in zip(window, self._ocr_rendered_pages(retry_paths)):
+                        if result[1] > page_results[i][1]:
+                            page_results[i] = result
+            
+            extracted_text = "".join(
+                f"\n--- Page {i+1} ---\n{page_text}" for i, (page_text, _) in enumerate(page_results)
+            )
             
             return extracted_text.strip()
             
@@ -162,6 +345,173 @@ class OCRProcessor:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise
     
+    def _rasterize_pdf(self, pdf_path: str, dpi: int, output_folder: str,
+                       first_page: int, last_page: int) -> List[str]:
+        """
+        Render a range of PDF pages to grayscale PGM files
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            dpi (int): Rendering resolution
+            output_folder (str): Directory to write the page images to
+            first_page (int): 1-based first page to render
+            last_page (int): 1-based last page to render, inclusive
+            
+        Returns:
+            List[str]: Page image paths, in page order
+        """
+        # Uncompressed grayscale output is cheap to write and read back,
+        # and spares preprocessing the colour conversion
+        options = {'dpi': dpi, 'thread_count': PDF_RASTER_THREADS,
+                   'first_page': first_page, 'last_page': last_page,
+                   'output_folder': output_folder, 'paths_only': True,
+                   'fmt': 'ppm', 'grayscale': True}
+        return convert_from_path(pdf_path, **options)
+    
+    def _ocr_rendered_pages(self, page_paths: List[str]) -> List[Tuple[str, float]]:
+        """
+        OCR rendered PDF pages, deleting their images once done
+        
+        Args:
+            page_paths (List[str]): Page image paths
+            
+        Returns:
+            List[Tuple[str, float]]: (text, mean confidence) per page, in order
+        """
+        try:
+            return self._ocr_pages(page_paths)
+        finally:
+            for page_path in page_paths:
+                os.unlink(page_path)
+    
+    def _ocr_pages(self, page_paths: List[str]) -> List[Tuple[str, float]]:
+        """
+        OCR rasterized PDF pages, in parallel when there is more than one
+        and the pool has more than one process
+        
+        Args:
+            page_paths (List[str]): Page image paths
+            
+        Returns:
+            List[Tuple[str, float]]: (text, mean confidence) per page, in order
+        """
+        # Pool workers are daemonic and can't start a pool of their own, and
+        # a single-process pool would only add IPC to OCRing pages in turn
+        if (len(page_paths) > 1 and pool_size() > 1 and
+                not multiprocessing.current_process().daemon):
+            return get_worker_pool(self.temp_dir).map(ocr_page_job, page_paths)
+        return [self._ocr_page(page_path) for page_path in page_paths]
+    
+    def _ocr_page(self, page_path: str) -> Tuple[str, float]:
+        """
+        Preprocess and OCR a single rasterized PDF page
+        
+        Args:
+            page_path (str): Path to the page image
+            
+        Returns:
+            Tuple[str, float]: Extracted text and mean word confidence (0-100)
+        """
+        img_array = cv2.imread(page_path, cv2.IMREAD_UNCHANGED)
+        if img_array is None:
+            raise ValueError(f"Could not load rendered page: {page_path}")
+        
+        # Preprocess image
+        processed_image = self._preprocess_image(img_array)
+        
+        # Extract text
+        return self._image_to_text_and_confidence(processed_image)
+    
+    def _image_to_string(self, image: np.ndarray) -> str:
+        """
+        Run Tesseract on a preprocessed image as a single block of text
+        
+        Args:
+            image (np.ndarray): Preprocessed image
+            
+        Returns:
+            str: Recognized text
+        """
+        api = self._get_api()
+        if api is None:
+            return pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+        
+        self._set_api_image(api, image)
+        return api.GetUTF8Text()
+    
+    def _image_to_text_and_confidence(self, image: np.ndarray) -> Tuple[str, float]:
+        """
+        Run Tesseract on a preprocessed image and report how sure it was
+        
+        Args:
+            image (np.ndarray): Preprocessed image
+            
+        Returns:
+            Tuple[str, float]: Recognized text and mean word confidence (0-100)
+        """
+        api = self._get_api()
+        if api is None:
+            # One image_to_data run gives both the words and their confidences
+            data = pytesseract.image_to_data(image, config=TESSERACT_CONFIG,
+                                             output_type=pytesseract.Output.DICT)
+            lines = {}
+            confidences = []
+            for i, word in enumerate(data['text']):
+                confidence = float(data['conf'][i])
+                if confidence < 0 or not word.strip():
+                    continue
+                confidences.append(confidence)
+                line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+                lines.setdefault(line_key, []).append(word)
+            
+            text = '\n'.join(' '.join(words) for words in lines.values())
+            mean_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+            return text, mean_confidence
+        
+        self._set_api_image(api, image)
+        return api.GetUTF8Text(), float(api.MeanTextConf())
+    
+    def _get_api(self) -> Optional['PyTessBaseAPI']:
+        """
+        Get this thread's resident Tesseract engine, creating it if needed
+        
+        Returns:
+            Optional[PyTessBaseAPI]: The engine, or None without tesserocr
+        """
+        if self._api_options is None:
+            return None
+        api = getattr(self._engines, 'api', None)
+        if api is None:
+            api = PyTessBaseAPI(**self._api_options)
+            self._engines.api = api
+        return api
+    
+    def _set_api_image(self, api: 'PyTessBaseAPI', image: np.ndarray):
+        """
+        Hand raw pixels to the resident Tesseract engine. Unlike SetImage,
+        this skips building a PIL image and encoding it for Tesseract.
+        """
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+        api.SetImageBytes(image.tobytes(), width, height,
+                          bytes_per_pixel, width * bytes_per_pixel)
+    
+    def _downsample_image(self, image: np.ndarray) -> np.ndarray:
+        """
+        Shrink an image so its longer edge is at most MAX_IMAGE_EDGE pixels
+        
+        Args:
+            image (np.ndarray): Input image
+            
+        Returns:
+            np.ndarray: Downsampled image, or the input if already small enough
+        """
+        scale = MAX_IMAGE_EDGE / max(image.shape[:2])
+        if scale >= 1:
+            return image
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
     def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
         """
         Preprocess image to improve OCR accuracy
@@ -174,29 +524,70 @@ class OCRProcessor:
         """
         try:
             # Convert to grayscale if needed
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if image.ndim == 3:
+                gray = self._scratch_buffer('gray', image.shape[:2])
+                cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray)
             else:
-                gray = image.copy()
-            
-            # Apply denoising
-            denoised = cv2.medianBlur(gray, 5)
-            
-            # Apply adaptive thresholding
-            binary = cv2.adaptiveThreshold(
-                denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-            )
-            
-            # Apply morphological operations to clean up
-            kernel = np.ones((1, 1), np.uint8)
-            cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+                gray = image
+            
+            # Apply denoising: a separable Gaussian is enough for clean scans,
+            # the much costlier median filter is kept for speckled ones
+            denoised = self._scratch_buffer('denoised', gray.shape)
+            cv2.GaussianBlur(gray, (3, 3), 0, dst=denoised)
+            if cv2.norm(gray, denoised, cv2.NORM_L1) / gray.size > NOISE_THRESHOLD:
+                cv2.medianBlur(gray, 5, dst=denoised)
+            
+            # Binarize: a global Otsu threshold suits evenly lit scans, adaptive
+            # thresholding is kept for images with shadows or glare
+            if self._background_spread(denoised) > BACKGROUND_STD_LIMIT:
+                binary = cv2.adaptiveThreshold(
+                    denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+                )
+            else:
+                _, binary = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             
-            return cleaned
+            return binary
             
         except Exception as e:
             logger.error(f"Error preprocessing image: {str(e)}")
             return image
     
+    def _background_spread(self, image: np.ndarray) -> float:
+        """
+        Measure how unevenly a grayscale page is lit
+        
+        Args:
+            image (np.ndarray): Grayscale image
+            
+        Returns:
+            float: Standard deviation of the page background
+        """
+        # Averaging down to a thumbnail and taking local maxima leaves the
+        # paper's brightness with the dark text strokes removed
+        scale = BACKGROUND_SAMPLE_EDGE / max(image.shape[:2])
+        thumbnail = cv2.resize(image, None, fx=min(scale, 1.0), fy=min(scale, 1.0),
+                               interpolation=cv2.INTER_AREA)
+        background = cv2.dilate(thumbnail, np.ones((5, 5), np.uint8))
+        _, std_dev = cv2.meanStdDev(background)
+        return float(std_dev[0][0])
+    
+    def _scratch_buffer(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Get this thread's reusable uint8 buffer for a preprocessing stage
+        
+        Args:
+            name (str): Stage the buffer belongs to
+            shape (Tuple): Required buffer shape
+            
+        Returns:
+            np.ndarray: Buffer of the requested shape, contents undefined
+        """
+        buffer = getattr(self._scratch, name, None)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, np.uint8)
+            setattr(self._scratch, name, buffer)
+        return buffer
+    
     def extract_from_text(self, text: str) -> Dict:
         """
         Extract structured information from text
@@ -212,12 +603,13 @@ class OCRProcessor:
             cleaned_text = self._clean_text(text)
             
             # Extract different components
-            amount = self._extract_amount(cleaned_text)
-            date = self._extract_date(cleaned_text)
+            candidates = self._scan_patterns(cleaned_text)
+            amount = self._extract_amount(cleaned_text, candidates)
+            date = self._extract_date(cleaned_text, candidates)
             merchant = self._extract_merchant_name(cleaned_text)
             
             # Calculate confidence score
-            confidence = self._calculate_confidence(amount, date, merchant, cleaned_text)
+            confidence = self._calculate_confidence(amount, date, merchant, len(cleaned_text))
             
             return {
                 'extractedAmount': amount,
@@ -230,68 +622,119 @@ class OCRProcessor:
             logger.error(f"Error extracting from text: {str(e)}")
             raise
     
+    def _compile_pattern_database(self) -> 'hyperscan.Database':
+        """
+        Compile the amount and date patterns into one Hyperscan database
+        
+        Pattern id 0 is the amount alternation and ids 1..n are the date
+        patterns in order. Hyperscan has no lookaheads or capture groups, so
+        the expressions here only decide whether each pattern can match.
+        
+        Returns:
+            hyperscan.Database: Block-mode database
+        """
+        amount_expression = (
+            r'\$\s*\d|\d\.?\d*\s*\$|USD\s*\d|\d\.?\d*\s*USD'
+            r'|TOTAL\s*:?\s*\$?\s*\d|AMOUNT\s*:?\s*\$?\s*\d'
+        )
+        expressions = [amount_expression] + self.date_patterns
+        flags = (hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH |
+                 hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP)
+        
+        database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        database.compile(
+            expressions=[expression.encode() for expression in expressions],
+            ids=list(range(len(expressions))),
+            flags=[flags] * len(expressions)
+        )
+        return database
+    
+    def _scan_patterns(self, text: str) -> Optional[set]:
+        """
+        Find which amount/date patterns match somewhere in the text
+        
+        Args:
+            text (str): Text to scan
+            
+        Returns:
+            Optional[set]: Ids of matching patterns, or None without Hyperscan
+        """
+        if self._pattern_db is None:
+            return None
+        
+        matched = set()
+        
+        def on_match(pattern_id, start, end, flags, context):
+            matched.add(pattern_id)
+        
+        # Scratch space belongs to the database, so scans can't overlap
+        with self._pattern_db_lock:
+            self._pattern_db.scan(text.encode('utf-8'), match_event_handler=on_match)
+        return matched
+    
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text"""
         # Remove extra whitespace and normalize
-        cleaned = re.sub(r'\s+', ' ', text.strip())
+        cleaned = self._whitespace_re.sub(' ', text)
         
-        # Remove special characters that might interfere with parsing
-        cleaned = re.sub(r'[^\w\s\$\.\,\:\;\-\/\(\)]', ' ', cleaned)
+        # Remove special characters that might interfere with parsing; the
+        # precomputed table only covers ASCII, which is what OCR mostly yields
+        if cleaned.isascii():
+            cleaned = cleaned.translate(self._special_chars_table)
+        else:
+            cleaned = self._special_chars_re.sub(' ', cleaned)
         
-        return cleaned
+        # Strip last, so blanked-out characters at either end go too
+        return cleaned.strip()
     
-    def _extract_amount(self, text: str) -> Optional[float]:
+    def _extract_amount(self, text: str, candidates: Optional[set] = None) -> Optional[float]:
         """
         Extract monetary amount from text
         
         Args:
             text (str): Text to search
+            candidates (set): Pattern ids found by _scan_patterns, if available
             
         Returns:
             Optional[float]: Extracted amount or None
         """
-        amounts = []
+        if candidates is not None:
+            if 0 not in candidates:
+                return None
+        elif not self._money_prefilter_re.search(text):
+            return None
         
-        for pattern in self.currency_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                try:
-                    # Get the numeric part
-                    amount_str = match.group(1) if match.groups() else match.group(0)
-                    amount_str = re.sub(r'[^\d\.]', '', amount_str)
-                    
-                    if amount_str and '.' in amount_str:
-                        amount = float(amount_str)
-                        if 0.01 <= amount <= 10000:  # Reasonable range for receipt amounts
-                            amounts.append(amount)
-                    elif amount_str:
-                        amount = float(amount_str)
-                        if amount >= 1:  # Assume amounts without decimals are in dollars
-                            amounts.append(amount)
-                        elif amount >= 0.01:  # Small amounts might be valid
-                            amounts.append(amount)
-                            
-                except (ValueError, IndexError):
-                    continue
-        
-        if amounts:
-            # Return the largest reasonable amount (likely the total)
-            return max(amounts)
+        # Every capture is \d+\.?\d*, so it is already a valid float literal
+        best = None
+        for match in self._amount_re.finditer(text):
+            amount_str = match.group(match.lastindex)
+            amount = float(amount_str)
+            
+            # Amounts with decimals must fall in a reasonable receipt range;
+            # whole numbers are assumed to be in dollars
+            if amount < 0.01 or (amount > 10000 and '.' in amount_str):
+                continue
+            if best is None or amount > best:
+                best = amount
         
-        return None
+        # The largest reasonable amount is likely the total
+        return best
     
-    def _extract_date(self, text: str) -> Optional[str]:
+    def _extract_date(self, text: str, candidates: Optional[set] = None) -> Optional[str]:
         """
         Extract date from text
         
         Args:
             text (str): Text to search
+            candidates (set): Pattern ids found by _scan_patterns, if available
             
         Returns:
             Optional[str]: Extracted date in ISO format or None
         """
-        for pattern in self.date_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
+        for pattern_id, pattern in enumerate(self._date_res, start=1):
+            if candidates is not None and pattern_id not in candidates:
+                continue
+            matches = pattern.finditer(text)
             for match in matches:
                 date_str = match.group(1)
                 parsed_date = self._parse_date(date_str)
@@ -310,16 +753,13 @@ class OCRProcessor:
         Returns:
             Optional[str]: ISO formatted date or None
         """
-        # Common date formats to try
-        date_formats = [
-            '%m/%d/%Y', '%m-%d-%Y', '%m.%d.%Y',
-            '%m/%d/%y', '%m-%d-%y', '%m.%d.%y',
-            '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y',
-            '%d/%m/%y', '%d-%m-%y', '%d.%m.%y',
-            '%Y/%m/%d', '%Y-%m-%d', '%Y.%m.%d',
-            '%B %d, %Y', '%b %d, %Y',
-            '%d %B %Y', '%d %b %Y'
-        ]
+        # Only formats using the string's separator can match, so skip the rest
+        for separator in ('/', '-', '.'):
+            if separator in date_str:
+                date_formats = NUMERIC_DATE_FORMATS[separator]
+                break
+        else:
+            date_formats = MONTH_NAME_DATE_FORMATS
         
         for fmt in date_formats:
             try:
@@ -352,16 +792,16 @@ class OCRProcessor:
         # Look for merchant name in first few lines
         for i, line in enumerate(lines[:5]):
             line = line.strip()
-            if len(line) > 3 and not re.match(r'^\d+[\d\s\-\(\)]*$', line):
+            if len(line) > 3 and not self._digit_line_re.match(line):
                 # Skip lines that are just numbers (like phone numbers)
-                if not re.search(r'^\d{10,}$', line.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')):
+                if not self._phone_re.search(line.translate(self._phone_strip_table)):
                     # Check if line contains merchant indicators or is likely a business name
-                    if (any(indicator in line.lower() for indicator in self.merchant_indicators) or
-                        re.search(r'\b[A-Z][A-Za-z\s&]+\b', line)):
+                    if (self._merchant_indicators_re.search(line) or
+                        self._capitalized_re.search(line)):
                         return line[:50]  # Limit length
         
         # Fallback: look for capitalized words that might be business names
-        capitalized_words = re.findall(r'\b[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)*\b', text)
+        capitalized_words = self._capitalized_words_re.findall(text)
         for word_group in capitalized_words:
             if len(word_group) > 3 and len(word_group) < 50:
                 return word_group
@@ -369,7 +809,7 @@ class OCRProcessor:
         return None
     
     def _calculate_confidence(self, amount: Optional[float], date: Optional[str], 
-                            merchant: Optional[str], text: str) -> float:
+                            merchant: Optional[str], text_len: int) -> float:
         """
         Calculate confidence score based on extracted information
         
@@ -377,7 +817,7 @@ class OCRProcessor:
             amount: Extracted amount
             date: Extracted date
             merchant: Extracted merchant name
-            text: Original text
+            text_len: Length of the cleaned text
             
         Returns:
             float: Confidence score between 0 and 1
@@ -397,11 +837,26 @@ class OCRProcessor:
             confidence += 0.2
         
         # Text quality confidence
-        if len(text.strip()) > 20:
+        if text_len > 20:
             confidence += 0.1
         
         return min(confidence, 1.0)
     
+    def _get_tesseract_version(self) -> str:
+        """
+        Get the Tesseract version, looking it up only once
+        
+        Returns:
+            str: Tesseract version
+        """
+        if self._tesseract_version is None:
+            if self._api_options is not None:
+                # First line reads e.g. "tesseract 5.3.0"
+                self._tesseract_version = tesseract_version().split()[1]
+            else:
+                self._tesseract_version = str(pytesseract.get_tesseract_version())
+        return self._tesseract_version
+    
     def test_ocr_engine(self) -> Dict:
         """
         Test OCR engine functionality
@@ -411,13 +866,13 @@ class OCRProcessor:
         """
         try:
             # Create a simple test image with text
-            test_image = Image.new('RGB', (300, 100), color='white')
+            test_image = np.full((100, 300), 255, np.uint8)
             
-            # Try to process it
-            test_text = pytesseract.image_to_string(test_image)
+            # Try to process it, on the same engine receipts use
+            self._image_to_string(test_image)
             
             return {
-                'tesseract_version': pytesseract.get_tesseract_version(),
+                'tesseract_version': self._get_tesseract_version(),
                 'test_successful': True,
                 'message': 'OCR engine is working correctly'
             }
@@ -427,4 +882,76 @@ class OCRProcessor:
                 'test_successful': False,
                 'error': str(e),
                 'message': 'OCR engine test failed'
-            }
\ No newline at end of file
+            }
+
+# OCRProcessor owned by a multiprocessing pool worker, created once per process
+_worker_processor = None
+
+# Worker pool shared by batch receipts and PDF pages, started on first use
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+def pool_size() -> int:
+    """
+    Processes in this web worker's OCR pool: OCR_POOL_SIZE if set, else the
+    cores shared out between the pools of every web worker process
+    
+    Returns:
+        int: Pool processes, at least 1
+    """
+    if os.getenv('OCR_POOL_SIZE'):
+        return max(1, int(os.getenv('OCR_POOL_SIZE')))
+    web_workers = int(os.getenv('OCR_WEB_WORKERS', 1))
+    return max(1, (os.cpu_count() or 1) // web_workers)
+
+def get_worker_pool(temp_dir: Optional[str] = None) -> 'multiprocessing.pool.Pool':
+    """
+    Return this process's OCR worker pool, creating it if needed
+    
+    Args:
+        temp_dir (str): temp_dir for the workers' OCRProcessors
+        
+    Returns:
+        multiprocessing.pool.Pool: The shared pool
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            # The pool is started from a request thread; forking a process
+            # that has other threads running can deadlock the children, so
+            # start them from a clean forkserver where available
+            if 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+            else:
+                context = multiprocessing.get_context()
+            _worker_pool = context.Pool(
+                processes=pool_size(),
+                initializer=init_pool_worker,
+                initargs=(temp_dir,)
+            )
+            atexit.register(_worker_pool.terminate)
+        return _worker_pool
+
+def init_pool_worker(temp_dir: Optional[str] = None):
+    """Pool initializer: build the worker's OCRProcessor"""
+    global _worker_processor
+    _worker_processor = OCRProcessor(temp_dir)
+
+def process_receipt_job(file_path: str) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """
+    Pool task: process one receipt file
+    
+    Args:
+        file_path (str): Path to the receipt file
+        
+    Returns:
+        Tuple: (file_path, result, error message)
+    """
+    try:
+        return file_path, _worker_processor.process_receipt(file_path), None
+    except Exception as e:
+        return file_path, None, str(e)
+
+def ocr_page_job(page_path: str) -> Tuple[str, float]:
+    """Pool task: OCR one rasterized PDF page, returning (text, confidence)"""
+    return _worker_processor._ocr_page(page_path)